@@ -485,7 +485,7 @@ def amend(ui, repo, *pats, **opts):
             noconflictmsg = _(
                 "restacking would create conflicts (%s in %s), so you must run it manually\n(run `hg restack` manually to restack this commit's children)"
             )
-            revs = [c.hex() for c in repo.set("(%n::)-%n", old.node(), old.node())]
+            revs = [hex(n) for n in repo.nodes("(%n::)-%n", old.node(), old.node())]
             with ui.configoverride({("rebase", "noconflictmsg"): noconflictmsg}):
                 # Note: this has effects on linearizing (old:: - old). That can
                 # fail. If that fails, it might make sense to try a plain
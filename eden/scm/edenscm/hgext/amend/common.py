@@ -18,9 +18,12 @@ from edenscm.mercurial import (
     extensions,
     lock as lockmod,
     mutation,
+    pycompat,
+    scmutil,
+    util,
 )
 from edenscm.mercurial.i18n import _
-from edenscm.mercurial.node import nullid
+from edenscm.mercurial.node import hex, nullrev
 
 
 def getchildrelationships(repo, nodes):
@@ -28,12 +31,18 @@ def getchildrelationships(repo, nodes):
        nodes. This information will prevent us from having to repeatedly
        perform children that reconstruct these relationships each time.
     """
-    cl = repo.changelog
+    # Walk the revlog index directly rather than calling cl.parents() per
+    # node, which would do a node -> rev lookup for every descendant.
+    index = repo.changelog.index
     children = defaultdict(set)
-    for node in repo.nodes("(%ln)::", nodes):
-        for parent in cl.parents(node):
-            if parent != nullid:
-                children[parent].add(node)
+    for rev in repo.revs("(%ln)::", nodes):
+        entry = index[rev]
+        node = entry[7]
+        p1, p2 = entry[5], entry[6]
+        if p1 != nullrev:
+            children[index[p1][7]].add(node)
+        if p2 != nullrev:
+            children[index[p2][7]].add(node)
     return children
 
 
@@ -57,10 +66,16 @@ def restackonce(
     """
     # Get visible, non-obsolete descendants of precusors of rev.
     allpredecessors = repo.revs("predecessors(%d) - (%d)", rev, rev)
-    fmt = "%s(%%ld) - %%ld - obsolete()" % (
-        "children" if childrenonly else "descendants"
-    )
-    descendants = repo.revs(fmt, allpredecessors, allpredecessors)
+
+    # Without predecessors there is nothing to restack, so skip evaluating
+    # the descendants revset altogether.
+    if not allpredecessors:
+        return
+
+    fmt = "%s(%%ld) - obsolete()" % ("children" if childrenonly else "descendants")
+    # Subtract the predecessors from the already computed smartset rather
+    # than formatting them into the revset a second time.
+    descendants = repo.revs(fmt, allpredecessors) - allpredecessors
 
     # Nothing to do if there are no descendants.
     if not descendants:
@@ -109,29 +124,44 @@ def latest(repo, rev):
     return latest if latest is not None else rev
 
 
+def bookmarksonnodes(repo, nodes):
+    """Return a sorted list of (bookmark, node) for the bookmarks pointing to
+    any of nodes, scanning the bookmarks only once.
+    """
+    nodes = set(nodes)
+    return sorted((b, n) for b, n in pycompat.iteritems(repo._bookmarks) if n in nodes)
+
+
 def bookmarksupdater(repo, oldids):
     """Return a callable update(newid) updating the current bookmark
-    and bookmarks bound to oldid to newid.
+    and bookmarks bound to oldids (a node or an iterable of nodes) to newid.
+
+    The bookmarks to move are looked up when the callable is created.
     """
-    if type(oldids) is bytes:
+    if isinstance(oldids, bytes):
         oldids = [oldids]
+    oldbookmarks = [b for b, _n in bookmarksonnodes(repo, oldids)]
 
     def updatebookmarks(newid):
-        tr = repo.currenttransaction()
-        dirty = False
-        for oldid in oldids:
-            changes = []
-            oldbookmarks = repo.nodebookmarks(oldid)
-            if oldbookmarks:
-                for b in oldbookmarks:
-                    changes.append((b, newid))
-                dirty = True
-            if dirty:
-                repo._bookmarks.applychanges(repo, tr, changes)
+        if oldbookmarks:
+            tr = repo.currenttransaction()
+            changes = [(b, newid) for b in oldbookmarks]
+            repo._bookmarks.applychanges(repo, tr, changes)
 
     return updatebookmarks
 
 
+def _samecontent(head, base, items):
+    """Yield (path, fctx, same) for each (path, headnode, basenode) in items,
+    where fctx is the file context of path in head and same is True if the
+    file has the same content in head and base.
+    """
+    for path, headnode, basenode in items:
+        fctx = head.filectx(path, fileid=headnode)
+        same = fctx.data() == base.filectx(path, fileid=basenode).data()
+        yield path, fctx, same
+
+
 def rewrite(repo, old, updates, head, newbases, commitopts, mutop=None):
     """Return (nodeid, created) where nodeid is the identifier of the
     changeset generated by the rewrite process, and created is True if
@@ -156,28 +186,56 @@ def rewrite(repo, old, updates, head, newbases, commitopts, mutop=None):
         for u in updates:
             files.update(u.files())
 
-        # Recompute copies (avoid recording a -> b -> a)
-        copied = copies.pathcopies(base, head)
-
-        # prune files which were reverted by the updates
-        def samefile(f):
-            if f in head.manifest():
-                a = head.filectx(f)
-                if f in base.manifest():
-                    b = base.filectx(f)
-                    return a.data() == b.data() and a.flags() == b.flags()
-                else:
-                    return False
-            else:
-                return f not in base.manifest()
-
-        files = [f for f in files if not samefile(f)]
-        # commit version of these files as defined by head
         headmf = head.manifest()
+        basemf = base.manifest()
+
+        # prune files which were reverted by the updates: a file changed if
+        # it exists on one side only or its flags differ; identical
+        # filenodes imply identical content, so only files whose filenodes
+        # differ need their data compared.
+        changed = set()
+        tocompare = []
+        for f in files:
+            headnode = headmf.get(f)
+            basenode = basemf.get(f)
+            if headnode is None:
+                if basenode is not None:
+                    changed.add(f)
+            elif basenode is None or headmf.flags(f) != basemf.flags(f):
+                changed.add(f)
+            elif headnode != basenode:
+                tocompare.append((f, headnode, basenode))
+
+        # Fetch both revisions of the files to compare in one batch rather
+        # than one at a time while reading them.
+        if tocompare and util.safehasattr(repo, "fileservice"):
+            fileids = []
+            for f, headnode, basenode in tocompare:
+                fileids.append((f, hex(headnode)))
+                fileids.append((f, hex(basenode)))
+            repo.fileservice.prefetch(fileids)
+
+        # keep the head file contexts around for filectxfn below
+        headfctxs = {}
+        for f, fctx, same in _samecontent(head, base, tocompare):
+            if not same:
+                changed.add(f)
+                headfctxs[f] = fctx
+
+        # only the candidate files were classified, so what changed is
+        # exactly the set of files to commit
+        files = changed
+
+        # Recompute copies (avoid recording a -> b -> a), only for the files
+        # that are actually committed
+        copied = copies.pathcopies(base, head, match=scmutil.matchfiles(repo, files))
 
+        # commit version of these files as defined by head
         def filectxfn(repo, ctx, path):
             if path in headmf:
-                fctx = head[path]
+                fctx = headfctxs.get(path)
+                if fctx is None:
+                    fctx = head[path]
                 flags = fctx.flags()
                 mctx = context.memfilectx(
                     repo,
@@ -228,6 +228,9 @@ def prune(ui, repo, *revs, **opts):
         # informs that changeset have been pruned
         ui.status(_("%i changesets pruned\n") % len(precs))
 
+        # move bookmarks on pruned changesets to their closest visible
+        # ancestor
+        dests = {}
         for ctx in repo.unfiltered().set("bookmark() and %ld", precs):
             # used to be:
             #
@@ -239,10 +242,15 @@ def prune(ui, repo, *revs, **opts):
             # slower. The new forms makes as much sense and a much faster.
             for dest in ctx.ancestors():
                 if not dest.obsolete():
-                    updatebookmarks = common.bookmarksupdater(repo, ctx.node())
-                    updatebookmarks(dest.node())
+                    dests[ctx.node()] = dest.node()
                     break
 
+        # Scan the bookmarks once and apply all moves together, rather than
+        # doing a reverse lookup and a separate change per pruned changeset.
+        if dests:
+            changes = [(b, dests[n]) for b, n in common.bookmarksonnodes(repo, dests)]
+            repo._bookmarks.applychanges(repo, tr, changes)
+
         tr.close()
     finally:
         lockmod.release(tr, lock, wlock)
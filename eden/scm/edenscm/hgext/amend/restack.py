@@ -10,6 +10,7 @@ from __future__ import absolute_import
 from edenscm.hgext import rebase
 from edenscm.mercurial import commands, revsetlang
 from edenscm.mercurial.i18n import _
+from edenscm.mercurial.node import hex
 
 
 def restack(ui, repo, **rebaseopts):
@@ -39,7 +40,7 @@ def restack(ui, repo, **rebaseopts):
             # 3. Connect revs via changelog again to cover missing revs
             revs = list(repo.revs("draft() & ((draft() & %ld)::)", revs))
 
-            rebaseopts["rev"] = [ctx.hex() for ctx in repo.set("%ld", revs)]
+            rebaseopts["rev"] = [hex(n) for n in repo.nodes("%ld", revs)]
 
         rebaseopts["dest"] = "_destrestack(SRC)"
 
@@ -266,3 +266,36 @@ When rebase is involved
 
   $ hg fold --exact 0 8 -T '{nodechanges|json}' -q
   {"d65bf110c68ee2cf0a0ba076da90df3fcf76229b": ["785c10c9aad58fba814a235f074a79bdc5535083"], "fdaccbb26270c9a42503babe11fd846d7300df0b": ["785c10c9aad58fba814a235f074a79bdc5535083"]} (no-eol)
+
+Test which files a fold records: a file reverted to its original content under
+a different filenode is dropped, a flag-only change is kept, a file added and
+then removed again is dropped, and copies of committed files are recorded.
+
+#if execbit
+  $ newrepo
+  $ echo a > a
+  $ echo b > b
+  $ echo x > x
+  $ hg commit -Aqm base
+  $ echo changed > a
+  $ chmod +x b
+  $ echo new > new
+  $ hg add new
+  $ hg cp x y
+  $ hg commit -m change
+  $ echo a > a
+  $ hg rm new
+  $ hg commit -m revert
+  $ hg fold -q --exact 1 2 -m folded
+  $ hg status --change . -C
+  M b
+  A y
+    x
+  $ hg diff --git -c .
+  diff --git a/b b/b
+  old mode 100644
+  new mode 100755
+  diff --git a/x b/y
+  copy from x
+  copy to y
+#endif
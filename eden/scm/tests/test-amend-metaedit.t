@@ -496,3 +496,19 @@ Test reusing commit message from another commit
   |
   o  A
   
+
+Test that a folding metaedit records renames of committed files. The other
+cases of which files a fold records are covered in test-amend-fold.t.
+
+  $ newrepo
+  $ echo x > x
+  $ hg commit -Aqm base
+  $ hg mv x y
+  $ hg commit -m rename
+  $ echo y >> y
+  $ hg commit -m change
+  $ hg metaedit -q --fold -r 1::2 -m folded
+  $ hg status --change tip -C
+  A y
+    x
+  R x
@@ -0,0 +1,31 @@
+#chg-compatible
+
+Set up test environment.
+  $ configure evolution
+  $ enable amend
+  $ setconfig hint.ack=*
+
+Bookmarks on pruned changesets move to their closest visible ancestor. Several
+pruned changesets carry bookmarks here, and B carries two of them.
+  $ newrepo
+  $ hg debugdrawdag <<'EOS'
+  > C E
+  > | |
+  > B D
+  > |/
+  > A
+  > EOS
+  $ hg bookmark -r B B2
+  $ hg log -r 'bookmark()' -T '{desc}: {bookmarks}\n'
+  A: A
+  B: B B2
+  C: C
+  D: D
+  E: E
+
+D stays visible as the parent of E, but is obsolete, so its bookmark moves too.
+  $ hg prune -r 'B+C+D'
+  3 changesets pruned
+  $ hg log -r 'bookmark()' -T '{desc}: {bookmarks}\n'
+  A: A B B2 C D
+  E: E